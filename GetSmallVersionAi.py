@@ -1,10 +1,12 @@
 import os
 import shutil
-import filecmp
+import sys
 import argparse
-import yaml
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from textwrap import dedent
 
 # Default fallback values
@@ -14,13 +16,36 @@ DEFAULT_EXCLUDE_EXTS = []
 DEFAULT_VERBOSE = False
 DEFAULT_OUTPUT_ROOT = "./MyDiffOutput"
 DEFAULT_YAML = "./SmallVersion.yaml"
+DEFAULT_WORKERS = (os.cpu_count() or 1) * 2
+MAX_IN_FLIGHT = DEFAULT_WORKERS * 4
+VERBOSE_BATCH = 128
 CURRENT_YEAR = datetime.now().year
 
+# Regex Breakdown:
+# 1. (Copyright\s*) : Catch keyword
+# 2. (\(c\)\s*)? : Optional (c)
+# 3. (\d{4}\s*-\s*)? : Optional start year range (e.g., 2013 - )
+# 4. (\d{4}) : The target year to be updated
+# 5. (,\s*)? : Optional comma
+# 6. (Insyde Software Corp\. All Rights Reserved\.) : Company info
+COPYRIGHT_RE = re.compile(r"(Copyright\s*)(\(c\)\s*)?(\d{4}\s*-\s*)?(\d{4})(,\s*)?(Insyde Software Corp\. All Rights Reserved\.)")
+# Target: Copyright 2026 Insyde Software Corp. All Rights Reserved.
+_NEW_FMT = f"Copyright {CURRENT_YEAR} \\g<6>"
+# Target: Copyright (c) 2026, Insyde Software Corp. All Rights Reserved.
+_OLD_FMT = f"Copyright (c) {CURRENT_YEAR}, \\g<6>"
+
 def load_config(config_path):
     if not config_path or not os.path.exists(config_path):
         return {}
+    # Imported here so runs without a config file don't pay for PyYAML
+    import yaml
+    try:
+        # libyaml-backed loader when available; much faster than the pure-Python one
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
     with open(config_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+        return yaml.load(f, Loader=SafeLoader) or {}
 
 def prepare_output_dir(path, verbose):
     """
@@ -39,109 +64,223 @@ def prepare_output_dir(path, verbose):
 
     os.makedirs(path, exist_ok=True)
 
-def should_exclude(rel_path, file_name, exclude_dirs, exclude_files, exclude_exts):
-    for part in rel_path.split(os.sep):
-        if part in exclude_dirs:
-            return True
+def should_exclude(file_name, exclude_files, exclude_exts):
+    # Excluded directories are pruned by diff_dirs and never reach here
     if file_name in exclude_files:
         return True
-    _, ext = os.path.splitext(file_name)
+    # Same result as os.path.splitext (leading dots don't start an extension),
+    # without its extra slicing on every walked file
+    dot = file_name.rfind(".")
+    ext = file_name[dot:] if dot > 0 and (file_name[0] != "." or file_name[:dot].strip(".")) else ""
     if ext in exclude_exts:
         return True
     return False
 
-def copy_with_copyright_update(src_path, dst_path, use_new_format):
+def scan_dir(path):
+    """
+    Returns {os.path.normcase(name): os.DirEntry} for one directory, or {}
+    when path is None or unreadable (os.walk silently skips unreadable
+    directories too). Keying by normcase pairs Foo.c with foo.c on Windows.
+    """
+    if path is None:
+        return {}
+    try:
+        with os.scandir(path) as it:
+            return {os.path.normcase(entry.name): entry for entry in it}
+    except OSError:
+        return {}
+
+def ensure_dir(path, created_dirs):
+    """
+    os.makedirs that remembers what it already created in created_dirs,
+    so files sharing a directory only pay for the first mkdir.
+    """
+    if path not in created_dirs:
+        os.makedirs(path, exist_ok=True)
+        created_dirs.add(path)
+
+def files_equal(path_a, path_b, stat_a=None, stat_b=None, trust_mtime=False):
+    """
+    Byte-for-byte comparison of two files.
+    Differing sizes short-circuit without opening either file; pass in
+    cached stat results (e.g. from DirEntry.stat()) to skip the re-stat.
+    With trust_mtime, equal size and mtime are taken as equal content.
+    """
+    if stat_a is None:
+        stat_a = os.stat(path_a)
+    if stat_b is None:
+        stat_b = os.stat(path_b)
+    if stat_a.st_size != stat_b.st_size:
+        return False
+    if trust_mtime and stat_a.st_mtime_ns == stat_b.st_mtime_ns:
+        return True
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        while True:
+            block_a = fa.read(1 << 16)
+            block_b = fb.read(1 << 16)
+            if block_a != block_b:
+                return False
+            if not block_a:
+                return True
+
+def _write_unchanged(raw, src_path, dst_path, copy_file):
+    """
+    Writes already-read file bytes to dst_path instead of copying from disk
+    again, keeping metadata the same way copy_file would.
+    """
+    with open(dst_path, "wb") as f:
+        f.write(raw)
+    if copy_file is shutil.copy2:
+        shutil.copystat(src_path, dst_path)
+
+def copy_with_copyright_update(src_path, dst_path, use_new_format, created_dirs, copy_file):
     """
     Handles transition between:
     - Old: Copyright (c) 2013 - 2023, Insyde...
     - New: Copyright 2026 Insyde...
     """
     try:
-        with open(src_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # Regex Breakdown:
-        # 1. (Copyright\s*) : Catch keyword
-        # 2. (\(c\)\s*)? : Optional (c)
-        # 3. (\d{4}\s*-\s*)? : Optional start year range (e.g., 2013 - )
-        # 4. (\d{4}) : The target year to be updated
-        # 5. (,\s*)? : Optional comma
-        # 6. (Insyde Software Corp\. All Rights Reserved\.) : Company info
-        pattern = r"(Copyright\s*)(\(c\)\s*)?(\d{4}\s*-\s*)?(\d{4})(,\s*)?(Insyde Software Corp\. All Rights Reserved\.)"
-
-        def replacement_logic(m):
-            # If the specific version already matches current year AND format, return as is to save noise
-            # But usually, it's safer to just re-format.
-            if use_new_format:
-                # Target: Copyright 2026 Insyde Software Corp. All Rights Reserved.
-                return f"Copyright {CURRENT_YEAR} {m.group(6)}"
-            else:
-                # Target: Copyright (c) 2026, Insyde Software Corp. All Rights Reserved.
-                return f"Copyright (c) {CURRENT_YEAR}, {m.group(6)}"
-
-        new_content = re.sub(pattern, replacement_logic, content)
-
-        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-        with open(dst_path, "w", encoding="utf-8") as f:
+        with open(src_path, "rb") as f:
+            raw = f.read()
+
+        ensure_dir(os.path.dirname(dst_path), created_dirs)
+
+        # Cheap byte-level check first; most files have no Insyde header at all
+        # and are copied without ever being decoded. The company name is the
+        # rarer literal, so one scan for it filters as well as two would.
+        if b"Insyde Software Corp" not in raw:
+            _write_unchanged(raw, src_path, dst_path, copy_file)
+            return
+
+        content = raw.decode("utf-8")
+        new_content = COPYRIGHT_RE.sub(_NEW_FMT if use_new_format else _OLD_FMT, content)
+
+        # Nothing matched, or every header was already current in the target
+        # format; write the original bytes rather than re-encoding the same text
+        if new_content == content:
+            _write_unchanged(raw, src_path, dst_path, copy_file)
+            return
+
+        # newline="" writes the original line endings back untouched
+        with open(dst_path, "w", encoding="utf-8", newline="") as f:
             f.write(new_content)
     except Exception:
         # Fallback to normal copy for binaries or encoding issues
-        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-        shutil.copy2(src_path, dst_path)
+        ensure_dir(os.path.dirname(dst_path), created_dirs)
+        copy_file(src_path, dst_path)
+
+def diff_dirs(dir_a, dir_b, rel_path, exclude_dirs, exclude_files, exclude_exts):
+    """
+    Producer for compare_and_extract: descends folder A and folder B in lockstep
+    and yields one (entry_a, entry_b, rel_path) tuple per non-excluded file.
+    The entry missing from one side is None; dir_a/dir_b is None for a subtree
+    that only exists on the other side. Excluded directories are never opened.
+    Symlinked directories are not descended into (same as os.walk).
+    """
+    entries_a = scan_dir(dir_a)
+    entries_b = scan_dir(dir_b)
+    sub_dirs = []
+
+    # Keys in A first, then keys only in B. Output paths use the real entry
+    # name, preferring A's spelling when the case differs between versions.
+    for key in list(entries_a) + [k for k in entries_b if k not in entries_a]:
+        entry_a = entries_a.get(key)
+        entry_b = entries_b.get(key)
+        a_is_dir = entry_a is not None and entry_a.is_dir(follow_symlinks=False)
+        b_is_dir = entry_b is not None and entry_b.is_dir(follow_symlinks=False)
+
+        if a_is_dir or b_is_dir:
+            name = entry_a.name if a_is_dir else entry_b.name
+            if name not in exclude_dirs:
+                sub_dirs.append((entry_a.path if a_is_dir else None,
+                                 entry_b.path if b_is_dir else None, name))
+
+        file_a = entry_a if not a_is_dir and entry_a is not None and entry_a.is_file() else None
+        file_b = entry_b if not b_is_dir and entry_b is not None and entry_b.is_file() else None
+        if file_a or file_b:
+            name = file_a.name if file_a else file_b.name
+            if not should_exclude(name, exclude_files, exclude_exts):
+                yield file_a, file_b, rel_path
+
+    for sub_a, sub_b, name in sub_dirs:
+        sub_rel = name if rel_path == os.curdir else os.path.join(rel_path, name)
+        yield from diff_dirs(sub_a, sub_b, sub_rel, exclude_dirs, exclude_files, exclude_exts)
 
-def compare_and_extract(folder_a, folder_b, output_root, exclude_dirs, exclude_files, exclude_exts, verbose, update_copyright, use_new_format):
+def _process_one(task, orig_prefix, mod_prefix, update_copyright, use_new_format, created_dirs, copy_file, trust_mtime):
+    """
+    Worker for compare_and_extract: diffs and copies a single file.
+    Returns the verbose status line, or None if nothing was extracted.
+    """
+    entry_a, entry_b, rel_path = task
+
+    if entry_a is not None:
+        file = entry_a.name
+        if entry_b is not None and files_equal(entry_a.path, entry_b.path, entry_a.stat(), entry_b.stat(), trust_mtime):
+            return None
+
+        out_dir = orig_prefix + rel_path
+        target_a = out_dir + os.sep + file
+        ensure_dir(out_dir, created_dirs)
+        copy_file(entry_a.path, target_a)
+        if entry_b is None:
+            return f"[Only in A] {rel_path}{os.sep}{file}"
+        status = "Modified"
+    else:
+        file = entry_b.name
+        status = "Only in B"
+
+    path_b = entry_b.path
+    out_dir = mod_prefix + rel_path
+    target_b = out_dir + os.sep + file
+    ensure_dir(out_dir, created_dirs)
+    if update_copyright:
+        copy_with_copyright_update(path_b, target_b, use_new_format, created_dirs, copy_file)
+    else:
+        copy_file(path_b, target_b)
+    return f"[{status}] {rel_path}{os.sep}{file}"
+
+def compare_and_extract(folder_a, folder_b, output_root, exclude_dirs, exclude_files, exclude_exts, verbose, update_copyright, use_new_format, preserve_mtime, trust_mtime):
     original_dir = os.path.join(output_root, "Original")
     modified_dir = os.path.join(output_root, "Modified")
 
-    # Pass 1: folder_a -> folder_b (Find differences and modified files)
-    for root, _, files in os.walk(folder_a):
-        rel_path = os.path.relpath(root, folder_a)
-        counterpart_root = os.path.join(folder_b, rel_path)
-        for file in files:
-            if should_exclude(rel_path, file, exclude_dirs, exclude_files, exclude_exts):
-                continue
-
-            path_a = os.path.join(root, file)
-            path_b = os.path.join(counterpart_root, file)
-
-            if not os.path.exists(path_b) or not filecmp.cmp(path_a, path_b, shallow=False):
-                target_a = os.path.join(original_dir, rel_path, file)
-                target_b = os.path.join(modified_dir, rel_path, file)
-
-                os.makedirs(os.path.dirname(target_a), exist_ok=True)
-                shutil.copy2(path_a, target_a)
-
-                if os.path.exists(path_b):
-                    os.makedirs(os.path.dirname(target_b), exist_ok=True)
-                    if update_copyright:
-                        copy_with_copyright_update(path_b, target_b, use_new_format)
-                    else:
-                        shutil.copy2(path_b, target_b)
-
-                if verbose:
-                    status = "Modified" if os.path.exists(path_b) else "Only in A"
-                    print(f"[{status}] {os.path.join(rel_path, file)}")
-
-    # Pass 2: folder_b -> folder_a (Find new files only in B)
-    for root, _, files in os.walk(folder_b):
-        rel_path = os.path.relpath(root, folder_b)
-        counterpart_root = os.path.join(folder_a, rel_path)
-        for file in files:
-            if should_exclude(rel_path, file, exclude_dirs, exclude_files, exclude_exts):
-                continue
-
-            path_b = os.path.join(root, file)
-            path_a = os.path.join(counterpart_root, file)
-
-            if not os.path.exists(path_a):
-                target_b = os.path.join(modified_dir, rel_path, file)
-                os.makedirs(os.path.dirname(target_b), exist_ok=True)
-                if update_copyright:
-                    copy_with_copyright_update(path_b, target_b, use_new_format)
-                else:
-                    shutil.copy2(path_b, target_b)
-                if verbose:
-                    print(f"[Only in B] {os.path.join(rel_path, file)}")
+    # The diff viewer doesn't need timestamps; copyfile skips copy2's extra stat/utime/chmod
+    copy_file = shutil.copy2 if preserve_mtime else shutil.copyfile
+    # Shared by all workers; a racing duplicate makedirs is harmless with exist_ok
+    created_dirs = set()
+    # Single walk over both trees; "." keeps root-level paths as before
+    tasks = diff_dirs(folder_a, folder_b, os.curdir, exclude_dirs, exclude_files, exclude_exts)
+    # rel_path is always relative and already os.sep-separated, so plain
+    # concatenation gives the same paths as os.path.join for a fraction of the cost
+    orig_prefix = original_dir + os.sep
+    mod_prefix = modified_dir + os.sep
+    worker = partial(_process_one, orig_prefix=orig_prefix, mod_prefix=mod_prefix,
+                     update_copyright=update_copyright, use_new_format=use_new_format,
+                     created_dirs=created_dirs, copy_file=copy_file, trust_mtime=trust_mtime)
+
+    # Status lines are batched into one stdout write per VERBOSE_BATCH files
+    pending = []
+
+    def report(future):
+        status = future.result()
+        if verbose and status:
+            pending.append(status + "\n")
+            if len(pending) >= VERBOSE_BATCH:
+                sys.stdout.write("".join(pending))
+                pending.clear()
+
+    # Files are independent, so overlap their I/O. Only MAX_IN_FLIGHT futures are
+    # kept alive at once so the walk streams with bounded memory, and draining
+    # them first-in first-out keeps results in walk order.
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=DEFAULT_WORKERS) as pool:
+        for task in tasks:
+            in_flight.append(pool.submit(worker, task))
+            if len(in_flight) >= MAX_IN_FLIGHT:
+                report(in_flight.popleft())
+        while in_flight:
+            report(in_flight.popleft())
+    if pending:
+        sys.stdout.write("".join(pending))
 
 def main():
     parser = argparse.ArgumentParser(
@@ -175,6 +314,10 @@ def main():
     parser.add_argument("-u", "--update-copyright", action="store_true", help="Enable copyright year update")
     parser.add_argument("-n", "--new-copyright-format", action="store_true",
                         help="Format: 'Copyright 2026 Insyde...' (no (c), no comma)")
+    parser.add_argument("--preserve-mtime", action="store_true",
+                        help="Keep timestamps/permissions on extracted files (slower)")
+    parser.add_argument("--trust-mtime", action="store_true",
+                        help="Treat files with equal size and mtime as identical without reading them")
 
     parser.add_argument("--exclude-dirs", nargs="*", help="Folder names to exclude")
     parser.add_argument("--exclude-files", nargs="*", help="File names to exclude")
@@ -191,6 +334,14 @@ def main():
     verbose       = args.verbose       or config.get("verbose", DEFAULT_VERBOSE)
     update_copyright = args.update_copyright or config.get("update_copyright", False)
     use_new_format   = args.new_copyright_format or config.get("new_copyright_format", False)
+    preserve_mtime   = args.preserve_mtime or config.get("preserve_mtime", False)
+    trust_mtime      = args.trust_mtime    or config.get("trust_mtime", False)
+
+    # exclude_dirs is checked for every directory entry in diff_dirs and the
+    # other two for every file in should_exclude; make those lookups O(1)
+    exclude_dirs  = frozenset(exclude_dirs)
+    exclude_files = frozenset(exclude_files)
+    exclude_exts  = frozenset(exclude_exts)
 
     # Step 1: Force Cleanup Output Directory (Requirement A)
     prepare_output_dir(output_root, verbose)
@@ -199,7 +350,7 @@ def main():
     compare_and_extract(
         args.folder_a, args.folder_b, output_root,
         exclude_dirs, exclude_files, exclude_exts,
-        verbose, update_copyright, use_new_format
+        verbose, update_copyright, use_new_format, preserve_mtime, trust_mtime
     )
 
     print(f"\n[SUCCESS] Comparison complete.")